@@ -1,141 +1,256 @@
 #!/usr/bin/env python3
 
 import argparse
+import collections
+import functools
+import io
 import os
+import queue
+import re
 import socket
 import threading
+import time
 import mimetypes
 import urllib.parse
-from datetime import datetime
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
 import ssl
 import random
 import string
 
+# Chunk size for buffered file copies and upload reads
+COPY_CHUNK_SIZE = 1 << 20
+
+# Limits for the rendered directory listing cache: entry count, total size, and
+# age (the directory mtime misses files rewritten in place, so pages also expire)
+DIR_CACHE_SIZE = 128
+DIR_CACHE_MAX_BYTES = 16 << 20
+DIR_CACHE_MAX_AGE = 5.0
+
+# Accept loops per port; more than one shares the port via SO_REUSEPORT (opt-in)
+DEFAULT_LISTENERS = 1
+
+# Largest header block accepted for a single multipart part
+MAX_PART_HEADER_SIZE = 16 << 10
+
+# Uploads are written with os.write() on a raw descriptor, straight from the receive buffer
+UPLOAD_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+
+# Number of worker threads handling connections
+THREAD_POOL_SIZE = int(os.environ.get('THREAD_POOL_SIZE', 32))
+
+# Idle connections are dropped after this many seconds so they can't hold workers forever
+CONNECTION_TIMEOUT = 60
+
+# Static parts of the directory listing page
+_HTML_HEAD = b"""<!DOCTYPE HTML>
+<html lang="en">
+<head>
+"""
+
+_HTML_STYLE = b"""<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<style>
+body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; margin: 0; padding: 20px; }
+h1 { border-bottom: 1px solid #ddd; padding-bottom: 10px; }
+table { border-collapse: collapse; width: 100%; }
+th, td { text-align: left; padding: 8px; border-bottom: 1px solid #ddd; }
+tr:hover { background-color: #f5f5f5; }
+a { text-decoration: none; color: #0366d6; }
+a:hover { text-decoration: underline; }
+.dir { font-weight: bold; }
+.size { color: #6c757d; }
+.upload { margin-top: 20px; padding: 10px; background-color: #f8f9fa; border-radius: 5px; }
+</style>
+</head>
+<body>
+"""
+
+_HTML_TABLE_HEAD = b"""<table>
+<tr><th>Name</th><th>Size</th><th>Last Modified</th></tr>
+<tr>
+<td><a href="../">..</a></td>
+<td class="size">-</td>
+<td>-</td>
+</tr>
+"""
+
+_HTML_TAIL = b"""</body>
+</html>"""
+
 class CustomHTTPRequestHandler(SimpleHTTPRequestHandler):
     """Custom HTTP request handler with logging and security features"""
     
+    # Seconds a connection may sit idle before its worker thread is freed
+    timeout = CONNECTION_TIMEOUT
+    
     def __init__(self, *args, directory=None, enable_uploads=False, **kwargs):
         self.enable_uploads = enable_uploads
         super().__init__(*args, directory=directory, **kwargs)
     
+    def setup(self):
+        """Disable Nagle's algorithm and finish the TLS handshake on this worker thread"""
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        
+        # Listener sockets don't handshake in accept(); doing it here keeps a silent
+        # client from stalling the accept loop and bounds it by CONNECTION_TIMEOUT
+        self.handshake_failed = False
+        if isinstance(self.connection, ssl.SSLSocket):
+            try:
+                self.connection.do_handshake()
+            except OSError as e:
+                self.log_message("TLS handshake failed: %s", e)
+                self.handshake_failed = True
+    
+    def handle(self):
+        """Handle the connection's requests, unless its TLS handshake failed"""
+        if not self.handshake_failed:
+            super().handle()
+    
+    def do_GET(self):
+        """Serve a GET request, corking the socket (Linux) so headers and body share segments"""
+        if not hasattr(socket, 'TCP_CORK'):
+            return super().do_GET()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 1)
+        try:
+            super().do_GET()
+        finally:
+            # Uncorking flushes whatever is still queued
+            try:
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 0)
+            except OSError:
+                pass
+    
     def log_message(self, format, *args):
         """Override logging to show client IP and timestamp"""
         client_ip = self.client_address[0]
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"[{timestamp}] {client_ip} - {format % args}")
-    
+
+    def copyfile(self, source, outputfile):
+        """Send a file body, using zero-copy sendfile() on plain TCP connections"""
+        try:
+            in_fd = source.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            in_fd = None
+
+        # The fast path writes to the connection itself, so only take it when that
+        # is where the caller asked the bytes to go
+        if (in_fd is not None and outputfile is self.wfile and hasattr(os, 'sendfile')
+                and not isinstance(self.connection, ssl.SSLSocket)):
+            # socket.sendfile() drives os.sendfile() and honours the connection timeout
+            self.connection.sendfile(source, source.tell())
+            return
+
+        # TLS (or in-memory source): copy through this thread's reusable buffer
+        view = get_buffer()
+        while True:
+            n = source.readinto(view)
+            if not n:
+                break
+            outputfile.write(view[:n])
+
     def list_directory(self, path):
-        """Generate directory listing with improved styling"""
+        """Serve a directory listing, reusing the cached page while the directory is unchanged"""
         try:
-            listing = os.listdir(path)
+            dir_mtime = cached_stat(path).st_mtime_ns
         except OSError:
             self.send_error(404, "No permission to list directory")
             return None
         
-        listing.sort(key=lambda x: (not os.path.isdir(os.path.join(path, x)), x.lower()))
+        key = (os.path.normpath(path), dir_mtime, self.path, self.enable_uploads)
+        encoded = listing_cache.get(key)
+        if encoded is None:
+            encoded = self.render_directory(path)
+            if encoded is None:
+                return None
+            listing_cache.put(key, encoded)
         
         enc = sys.getfilesystemencoding()
-        title = f"Directory listing for {self.path}"
+        self.send_page(encoded, "text/html; charset=%s" % enc)
+        return None
+    
+    def send_page(self, body, content_type):
+        """Send a 200 response whose status line, headers and body go out in one write"""
+        self.send_response(200)
+        self.send_header("Content-type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        
+        # Same as end_headers(), but the body joins the buffered header block
+        # so the whole response is a single sendall() instead of two
+        chunks = getattr(self, '_headers_buffer', [])
+        self._headers_buffer = []
+        if self.request_version != 'HTTP/0.9':
+            chunks.append(b"\r\n")
+        if self.command != 'HEAD':
+            chunks.append(body)
+        self.wfile.write(b"".join(chunks))
+    
+    def render_directory(self, path):
+        """Generate directory listing with improved styling"""
+        try:
+            # DirEntry caches the file type, so sorting and rendering need no extra stat calls
+            with os.scandir(path) as it:
+                listing = [entry for entry in it if not entry.name.startswith('.')]
+        except OSError:
+            self.send_error(404, "No permission to list directory")
+            return None
         
-        # Start HTML output
-        r = []
-        r.append('<!DOCTYPE HTML>')
-        r.append('<html lang="en">')
-        r.append('<head>')
-        r.append(f'<title>{title}</title>')
-        r.append('<meta charset="utf-8">')
-        r.append('<meta name="viewport" content="width=device-width, initial-scale=1.0">')
-        r.append('<style>')
-        r.append('body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; margin: 0; padding: 20px; }')
-        r.append('h1 { border-bottom: 1px solid #ddd; padding-bottom: 10px; }')
-        r.append('table { border-collapse: collapse; width: 100%; }')
-        r.append('th, td { text-align: left; padding: 8px; border-bottom: 1px solid #ddd; }')
-        r.append('tr:hover { background-color: #f5f5f5; }')
-        r.append('a { text-decoration: none; color: #0366d6; }')
-        r.append('a:hover { text-decoration: underline; }')
-        r.append('.dir { font-weight: bold; }')
-        r.append('.size { color: #6c757d; }')
-        r.append('.upload { margin-top: 20px; padding: 10px; background-color: #f8f9fa; border-radius: 5px; }')
-        r.append('</style>')
-        r.append('</head>')
-        r.append('<body>')
-        r.append(f'<h1>{title}</h1>')
-        r.append('<table>')
-        r.append('<tr><th>Name</th><th>Size</th><th>Last Modified</th></tr>')
+        listing.sort(key=lambda e: (not e.is_dir(), e.name.lower()))
+        
+        enc = sys.getfilesystemencoding()
+        title = f"Directory listing for {escape_html(self.path)}"
         
-        # Add parent directory entry
-        r.append('<tr>')
-        r.append('<td><a href="../">..</a></td>')
-        r.append('<td class="size">-</td>')
-        r.append('<td>-</td>')
-        r.append('</tr>')
+        # Static markup comes from module-level bytes constants; only the dynamic
+        # parts are formatted and encoded, straight into a single growing buffer
+        out = bytearray(_HTML_HEAD)
+        out += f'<title>{title}</title>\n'.encode(enc, 'surrogateescape')
+        out += _HTML_STYLE
+        out += f'<h1>{title}</h1>\n'.encode(enc, 'surrogateescape')
+        out += _HTML_TABLE_HEAD
         
         # Add directory entries and files
-        for name in listing:
-            fullname = os.path.join(path, name)
-            displayname = name
-            
-            # Skip hidden files
-            if name.startswith('.'):
-                continue
+        for entry in listing:
+            name = entry.name
+            displayname = escape_html(name)
             
             # Encode the name for URL
-            linkname = urllib.parse.quote(name)
+            linkname = quote_url(name)
             
-            # Get file information
+            # Get file information (a single stat per entry)
             try:
-                size = os.path.getsize(fullname)
-                size_str = self.format_size(size)
-                mtime = datetime.fromtimestamp(os.path.getmtime(fullname))
+                st = entry.stat()
+                size_str = format_size(st.st_size)
+                mtime = datetime.fromtimestamp(st.st_mtime)
                 mtime_str = mtime.strftime("%Y-%m-%d %H:%M:%S")
             except:
                 size_str = "Unknown"
                 mtime_str = "Unknown"
             
-            is_dir = os.path.isdir(fullname)
-            
-            r.append('<tr>')
-            if is_dir:
-                r.append(f'<td><a href="{linkname}/" class="dir">{displayname}/</a></td>')
-                r.append('<td class="size">-</td>')
+            if entry.is_dir():
+                row = (f'<tr>\n<td><a href="{linkname}/" class="dir">{displayname}/</a></td>\n'
+                       f'<td class="size">-</td>\n<td>{mtime_str}</td>\n</tr>\n')
             else:
-                r.append(f'<td><a href="{linkname}">{displayname}</a></td>')
-                r.append(f'<td class="size">{size_str}</td>')
-            
-            r.append(f'<td>{mtime_str}</td>')
-            r.append('</tr>')
+                row = (f'<tr>\n<td><a href="{linkname}">{displayname}</a></td>\n'
+                       f'<td class="size">{size_str}</td>\n<td>{mtime_str}</td>\n</tr>\n')
+            out += row.encode(enc, 'surrogateescape')
         
-        r.append('</table>')
+        out += b'</table>\n'
         
         # Add upload form if enabled
         if self.enable_uploads:
-            r.append('<div class="upload">')
-            r.append('<h2>Upload File</h2>')
-            r.append(f'<form action="{self.path}" method="POST" enctype="multipart/form-data">')
-            r.append('<input type="file" name="file">')
-            r.append('<input type="submit" value="Upload">')
-            r.append('</form>')
-            r.append('</div>')
-        
-        r.append('</body>')
-        r.append('</html>')
-        
-        encoded = '\n'.join(r).encode(enc, 'surrogateescape')
-        self.send_response(200)
-        self.send_header("Content-type", "text/html; charset=%s" % enc)
-        self.send_header("Content-Length", str(len(encoded)))
-        self.end_headers()
+            out += (f'<div class="upload">\n<h2>Upload File</h2>\n'
+                    f'<form action="{escape_html(self.path)}" method="POST" enctype="multipart/form-data">\n'
+                    f'<input type="file" name="file">\n<input type="submit" value="Upload">\n'
+                    f'</form>\n</div>\n').encode(enc, 'surrogateescape')
         
-        return encoded
+        out += _HTML_TAIL
+        return bytes(out)
     
-    def format_size(self, size):
-        """Format file size in human-readable format"""
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if size < 1024.0:
-                return f"{size:.1f} {unit}"
-            size /= 1024.0
-        return f"{size:.1f} PB"
+    def guess_type(self, path):
+        """Guess the MIME type of a file, memoized per extension"""
+        return guess_type_for_extension(os.path.splitext(path)[1])
     
     def do_POST(self):
         """Handle POST requests for file uploads"""
@@ -153,47 +268,392 @@ class CustomHTTPRequestHandler(SimpleHTTPRequestHandler):
         # Find the boundary
         boundary = content_type.split('=')[1].strip()
         
-        # Read the request body
+        # Stream the request body through a fixed-size buffer
         content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
-        
-        # Split by boundary
-        parts = post_data.split(bytes('--' + boundary, 'utf-8'))
-        
-        # Process each part
-        for part in parts:
-            if b'filename=' in part:
-                # Extract filename
-                filename_start = part.find(b'filename="') + 10
-                filename_end = part.find(b'"', filename_start)
-                filename = part[filename_start:filename_end].decode('utf-8')
-                
-                # Skip if no filename
-                if not filename:
-                    continue
-                
-                # Find the content
-                content_start = part.find(b'\r\n\r\n') + 4
-                content = part[content_start:-2]  # Skip the last \r\n
-                
-                # Save the file
-                file_path = os.path.join(self.directory, filename)
-                try:
-                    with open(file_path, 'wb') as f:
-                        f.write(content)
-                    self.log_message(f"File uploaded: {filename} ({self.format_size(len(content))})")
-                except Exception as e:
-                    self.log_message(f"Error saving file: {e}")
-                    self.send_error(500, f"Error saving file: {e}")
-                    return
+        try:
+            self.receive_multipart(boundary.encode('utf-8'), content_length)
+        except ValueError as e:
+            # Short, unterminated or malformed body
+            self.log_message(f"Rejected upload: {e}")
+            self.send_error(400, f"Bad Request - {e}")
+            return
+        except Exception as e:
+            self.log_message(f"Error saving file: {e}")
+            self.send_error(500, f"Error saving file: {e}")
+            return
         
         # Redirect back to the directory listing
         self.send_response(303)
         self.send_header("Location", self.path)
         self.end_headers()
+    
+    def receive_multipart(self, boundary, content_length):
+        """Parse a multipart/form-data body incrementally, writing file parts straight to disk"""
+        out = None
+        filename = None
+        written = 0
+        
+        def on_part_begin(headers):
+            nonlocal out, filename, written
+            # Extract filename
+            match = FILENAME_RE.search(headers)
+            filename = match.group(1).decode('utf-8') if match else None
+            
+            # Skip parts without a filename (plain form fields)
+            if filename:
+                out = os.open(os.path.join(self.directory, filename), UPLOAD_OPEN_FLAGS, 0o666)
+                written = 0
+        
+        def on_part_data(data):
+            nonlocal written
+            if out is not None:
+                write_all(out, data)
+                written += len(data)
+        
+        def on_part_end():
+            nonlocal out
+            if out is not None:
+                os.close(out)
+                out = None
+                self.log_message(f"File uploaded: {filename} ({format_size(written)})")
+        
+        parser = MultipartParser(boundary, on_part_begin, on_part_data, on_part_end)
+        view = get_buffer()
+        remaining = content_length
+        
+        try:
+            while not parser.done and remaining > 0:
+                n = self.rfile.readinto(view[:min(remaining, len(view))])
+                if not n:
+                    break
+                remaining -= n
+                parser.feed(view[:n])
+            if not parser.done:
+                raise ValueError("upload body ended before the closing boundary")
+        finally:
+            if out is not None:
+                # The part was cut off: don't leave a truncated file behind
+                os.close(out)
+                out = None
+                os.unlink(os.path.join(self.directory, filename))
+            # Drop the cached directory stat and pages: an overwritten file leaves the
+            # directory mtime unchanged, so the redirected listing would otherwise be stale
+            invalidate_stat(self.directory)
+            listing_cache.invalidate(self.directory)
+
+@functools.lru_cache(maxsize=4096)
+def format_size(size):
+    """Format file size in human-readable format"""
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if size < 1024.0:
+            return f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} PB"
+
+@functools.lru_cache(maxsize=1024)
+def guess_type_for_extension(ext):
+    """Map a file extension to a MIME type (same rules as SimpleHTTPRequestHandler)"""
+    extensions_map = CustomHTTPRequestHandler.extensions_map
+    if ext in extensions_map:
+        return extensions_map[ext]
+    if ext.lower() in extensions_map:
+        return extensions_map[ext.lower()]
+    guess, _ = mimetypes.guess_type('file' + ext)
+    return guess or 'application/octet-stream'
+
+class _URLQuoteTable(dict):
+    """str.translate() table that percent-encodes characters on first use"""
+    
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        if char in _URL_SAFE:
+            value = char
+        else:
+            value = ''.join(f'%{b:02X}' for b in char.encode('utf-8', 'surrogateescape'))
+        self[codepoint] = value
+        return value
+
+# Translation tables, so escaping a name is a single C-level str.translate() call
+_HTML_ESCAPE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'})
+_URL_SAFE = frozenset(string.ascii_letters + string.digits + '-_.~/')
+_URL_QUOTE = _URLQuoteTable()
+
+def escape_html(text):
+    """HTML-escape a file name or path for the listing page"""
+    return text.translate(_HTML_ESCAPE)
+
+def quote_url(text):
+    """Percent-encode a file name for use in a link"""
+    return text.translate(_URL_QUOTE)
+
+# Filename in a part's Content-Disposition header, matched directly on the receive buffer
+FILENAME_RE = re.compile(rb'filename="([^"]*)"')
+
+# Short-lived os.stat() cache for the directory mtime behind the listing cache key.
+# This saves one stat per polled listing; send_head() still stats the path and
+# probes for index.html/index.htm before list_directory() is reached.
+STAT_CACHE_TTL = 1.0
+STAT_CACHE_SIZE = 4096
+_stat_cache = collections.OrderedDict()
+_stat_cache_lock = threading.Lock()
+
+def cached_stat(path):
+    """Return os.stat(path), reusing a result younger than STAT_CACHE_TTL seconds"""
+    key = os.path.normpath(path)
+    now = time.monotonic()
+    with _stat_cache_lock:
+        hit = _stat_cache.get(key)
+        if hit is not None and now - hit[0] < STAT_CACHE_TTL:
+            return hit[1]
+    
+    st = os.stat(key)
+    with _stat_cache_lock:
+        _stat_cache[key] = (now, st)
+        _stat_cache.move_to_end(key)
+        if len(_stat_cache) > STAT_CACHE_SIZE:
+            _stat_cache.popitem(last=False)
+    return st
+
+def invalidate_stat(path):
+    """Drop a cached stat result, e.g. after the directory was modified"""
+    with _stat_cache_lock:
+        _stat_cache.pop(os.path.normpath(path), None)
+
+class ListingCache:
+    """Thread-safe LRU of rendered listing pages, bounded by count, total bytes and age.
+    
+    Keys are tuples whose first item is the normalized directory path.
+    """
+    
+    def __init__(self, max_entries, max_bytes, max_age):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._pages = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Return the cached page for key, or None if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            hit = self._pages.get(key)
+            if hit is None:
+                return None
+            if now - hit[0] >= self.max_age:
+                self._remove(key)
+                return None
+            self._pages.move_to_end(key)
+            return hit[1]
+    
+    def put(self, key, page):
+        if len(page) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._pages:
+                self._remove(key)
+            self._pages[key] = (time.monotonic(), page)
+            self._size += len(page)
+            while len(self._pages) > self.max_entries or self._size > self.max_bytes:
+                self._remove(next(iter(self._pages)))
+    
+    def invalidate(self, directory):
+        """Drop every cached page of a directory, e.g. after files in it were written"""
+        directory = os.path.normpath(directory)
+        with self._lock:
+            for key in [k for k in self._pages if k[0] == directory]:
+                self._remove(key)
+    
+    def _remove(self, key):
+        _, page = self._pages.pop(key)
+        self._size -= len(page)
+
+listing_cache = ListingCache(DIR_CACHE_SIZE, DIR_CACHE_MAX_BYTES, DIR_CACHE_MAX_AGE)
+
+# Per-thread transfer buffers; pool workers are long-lived, so each allocates one once
+_thread_buffers = threading.local()
+
+def get_buffer():
+    """Return a memoryview over this thread's reusable COPY_CHUNK_SIZE buffer"""
+    view = getattr(_thread_buffers, 'view', None)
+    if view is None:
+        view = _thread_buffers.view = memoryview(bytearray(COPY_CHUNK_SIZE))
+    return view
+
+def write_all(fd, data):
+    """Write a bytes-like object to a file descriptor, retrying short writes"""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+class MultipartParser:
+    """Streaming multipart/form-data parser.
+    
+    Body chunks are passed to feed() as they arrive and scanned in place. The
+    callbacks are called with each part's raw header block, with slices of its
+    content (bytes-like, only valid during the call) and at the end of each part.
+    Only the few bytes that might start a delimiter split across two chunks, and
+    an incomplete header block, are copied and carried over to the next feed().
+    """
+    
+    def __init__(self, boundary, on_part_begin, on_part_data, on_part_end):
+        self.delimiter = b'\r\n--' + boundary
+        self.delimiter_re = re.compile(re.escape(self.delimiter))
+        self.on_part_begin = on_part_begin
+        self.on_part_data = on_part_data
+        self.on_part_end = on_part_end
+        # Prefix CRLF so the opening boundary matches the same delimiter as the rest
+        self.pending = bytearray(b'\r\n')
+        self.state = 'preamble'
+    
+    @property
+    def done(self):
+        return self.state == 'done'
+    
+    def feed(self, data):
+        """Consume the next chunk of the request body"""
+        view = memoryview(data)
+        delimiter = self.delimiter
+        # Bytes that must be held back in case a delimiter is split across chunks
+        keep = len(delimiter) - 1
+        pos = 0
+        
+        while self.state != 'done':
+            if self.state == 'headers':
+                block = self.pending + view[pos:pos + MAX_PART_HEADER_SIZE]
+                if len(block) >= 2 and block.startswith(b'--'):
+                    self.state = 'done'
+                    self.pending = bytearray()
+                    return
+                idx = block.find(b'\r\n\r\n')
+                if idx < 0:
+                    if len(block) >= MAX_PART_HEADER_SIZE:
+                        raise ValueError("multipart part headers too large")
+                    self.pending = block
+                    return
+                pos += idx + 4 - len(self.pending)
+                self.pending = bytearray()
+                self.on_part_begin(memoryview(block)[:idx])
+                self.state = 'body'
+                continue
+            
+            # Preamble or body: look for the next delimiter
+            if self.pending:
+                # Join the held-back tail with just enough of this chunk to
+                # find a delimiter that straddles the two
+                joined = self.pending + view[pos:pos + keep]
+                idx = joined.find(delimiter)
+                if idx >= 0:
+                    self._emit(joined[:idx])
+                    pos += idx + len(delimiter) - len(self.pending)
+                    self.pending = bytearray()
+                    self._end_part()
+                    continue
+                if len(joined) < len(self.pending) + keep:
+                    # This chunk was too short to rule a split delimiter out
+                    end = max(0, len(joined) - keep)
+                    self._emit(joined[:end])
+                    self.pending = joined[end:]
+                    return
+                # No delimiter can start in the held-back bytes
+                self._emit(self.pending)
+                self.pending = bytearray()
+            
+            match = self.delimiter_re.search(view, pos)
+            if match is None:
+                end = max(pos, len(view) - keep)
+                self._emit(view[pos:end])
+                self.pending = bytearray(view[end:])
+                return
+            self._emit(view[pos:match.start()])
+            pos = match.end()
+            self._end_part()
+    
+    def _emit(self, data):
+        if self.state == 'body' and len(data):
+            self.on_part_data(data)
+    
+    def _end_part(self):
+        """Handle a delimiter: finish the current part (if any) and expect headers"""
+        if self.state == 'body':
+            self.on_part_end()
+        self.state = 'headers'
+
+class WorkerPool:
+    """Bounded pool of daemon worker threads, started on demand.
+    
+    Unlike ThreadPoolExecutor, whose workers are joined at interpreter exit, a
+    connection still being served never keeps the process alive after Ctrl+C.
+    """
+    
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._queue = queue.SimpleQueue()
+        self._idle = threading.Semaphore(0)
+        self._threads = []
+        self._lock = threading.Lock()
+    
+    def submit(self, fn, *args):
+        self._queue.put((fn, args))
+        # Hand the work to an idle worker if there is one, otherwise grow the pool
+        if self._idle.acquire(blocking=False):
+            return
+        with self._lock:
+            if len(self._threads) < self.max_workers:
+                t = threading.Thread(target=self._worker, name=f"http-worker-{len(self._threads)}", daemon=True)
+                t.start()
+                self._threads.append(t)
+    
+    def shutdown(self):
+        """Ask idle workers to exit; busy ones are abandoned, not waited for"""
+        with self._lock:
+            for _ in self._threads:
+                self._queue.put(None)
+    
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            fn, args = item
+            del item
+            try:
+                fn(*args)
+            finally:
+                del fn, args
+                self._idle.release()
+
+class PooledHTTPServer(ThreadingHTTPServer):
+    """HTTP server that handles connections on a bounded pool of worker threads"""
+    
+    def __init__(self, *args, pool=None, reuse_port=False, **kwargs):
+        # Set before binding: TCPServer.__init__ calls server_close() if bind fails
+        self.reuse_port = reuse_port
+        self.owns_pool = pool is None
+        self.pool = WorkerPool(THREAD_POOL_SIZE) if pool is None else pool
+        super().__init__(*args, **kwargs)
+    
+    def server_bind(self):
+        """Set SO_REUSEPORT so several listeners can share the port"""
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+    
+    def process_request(self, request, client_address):
+        """Queue the connection on the pool instead of starting a new thread"""
+        self.pool.submit(self.process_request_thread, request, client_address)
+    
+    def server_close(self):
+        super().server_close()
+        if self.owns_pool:
+            self.pool.shutdown()
 
+@functools.lru_cache(maxsize=1)
 def get_local_ip():
-    """Get the local IP address"""
+    """Get the local IP address (the SERVER_IP environment variable overrides detection)"""
+    ip = os.environ.get('SERVER_IP')
+    if ip:
+        return ip
     try:
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         s.connect(("8.8.8.8", 80))
@@ -204,41 +664,65 @@ def get_local_ip():
         return "127.0.0.1"
 
 def generate_certificate(cert_file, key_file):
-    """Generate a self-signed certificate for HTTPS"""
+    """Generate a self-signed ECDSA P-256 certificate for HTTPS"""
     try:
-        from OpenSSL import crypto
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from cryptography.x509.oid import NameOID
         
-        # Create key pair
-        k = crypto.PKey()
-        k.generate_key(crypto.TYPE_RSA, 2048)
+        # Create key pair (ECDSA signs handshakes far faster than RSA-2048)
+        k = ec.generate_private_key(ec.SECP256R1())
         
         # Create certificate
-        cert = crypto.X509()
-        cert.get_subject().C = "US"
-        cert.get_subject().ST = "State"
-        cert.get_subject().L = "City"
-        cert.get_subject().O = "Organization"
-        cert.get_subject().OU = "Organizational Unit"
-        cert.get_subject().CN = socket.gethostname()
-        cert.set_serial_number(1000)
-        cert.gmtime_adj_notBefore(0)
-        cert.gmtime_adj_notAfter(10*365*24*60*60)  # 10 years
-        cert.set_issuer(cert.get_subject())
-        cert.set_pubkey(k)
-        cert.sign(k, 'sha256')
+        subject = x509.Name([
+            x509.NameAttribute(NameOID.COUNTRY_NAME, "US"),
+            x509.NameAttribute(NameOID.STATE_OR_PROVINCE_NAME, "State"),
+            x509.NameAttribute(NameOID.LOCALITY_NAME, "City"),
+            x509.NameAttribute(NameOID.ORGANIZATION_NAME, "Organization"),
+            x509.NameAttribute(NameOID.ORGANIZATIONAL_UNIT_NAME, "Organizational Unit"),
+            x509.NameAttribute(NameOID.COMMON_NAME, socket.gethostname()),
+        ])
+        now = datetime.now(timezone.utc)
+        cert = (x509.CertificateBuilder()
+                .subject_name(subject)
+                .issuer_name(subject)
+                .public_key(k.public_key())
+                .serial_number(1000)
+                .not_valid_before(now)
+                .not_valid_after(now + timedelta(days=10*365))  # 10 years
+                .sign(k, hashes.SHA256()))
         
-        # Save certificate and key
+        # Save certificate and key (reused on later runs)
         with open(cert_file, "wb") as f:
-            f.write(crypto.dump_certificate(crypto.FILETYPE_PEM, cert))
+            f.write(cert.public_bytes(serialization.Encoding.PEM))
         
         with open(key_file, "wb") as f:
-            f.write(crypto.dump_privatekey(crypto.FILETYPE_PEM, k))
+            f.write(k.private_bytes(serialization.Encoding.PEM,
+                                    serialization.PrivateFormat.TraditionalOpenSSL,
+                                    serialization.NoEncryption()))
         
         return True
     except Exception as e:
         print(f"Error generating certificate: {e}")
         return False
 
+def create_ssl_context(cert_file, key_file):
+    """Create a server-side TLS context tuned for bulk file transfers"""
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.minimum_version = ssl.TLSVersion.TLSv1_2
+    ctx.load_cert_chain(cert_file, key_file)
+    
+    # Prefer AES-GCM (AES-NI accelerated) for TLS 1.2; TLS 1.3 suites are left at their defaults
+    ctx.set_ciphers('ECDHE+AESGCM:!aNULL')
+    ctx.set_alpn_protocols(['http/1.1'])
+    ctx.options |= ssl.OP_NO_COMPRESSION
+    
+    # Session resumption is left at OpenSSL's defaults (session tickets and the
+    # server-side session cache are already on), so returning clients skip the
+    # full handshake
+    return ctx
+
 def main():
     parser = argparse.ArgumentParser(description="Simple HTTP File Server")
     
@@ -249,6 +733,7 @@ def main():
     parser.add_argument("-s", "--ssl", action="store_true", help="Enable HTTPS")
     parser.add_argument("--cert", default="server.crt", help="SSL certificate file (default: server.crt)")
     parser.add_argument("--key", default="server.key", help="SSL key file (default: server.key)")
+    parser.add_argument("--listeners", type=int, default=DEFAULT_LISTENERS, help=f"Number of accept loops sharing the port via SO_REUSEPORT, e.g. one per CPU (default: {DEFAULT_LISTENERS})")
     
     args = parser.parse_args()
     
@@ -266,17 +751,37 @@ def main():
                 args.ssl = False
     
     # Set up handler
-    handler = lambda *args, **kwargs: CustomHTTPRequestHandler(*args, directory=args.directory, enable_uploads=args.uploads, **kwargs)
+    handler = functools.partial(CustomHTTPRequestHandler, directory=args.directory, enable_uploads=args.uploads)
     
-    # Create server
-    server = HTTPServer((args.bind, args.port), handler)
+    # Create servers (connections are served by a bounded thread pool, so a slow
+    # download doesn't block other clients and bursts can't spawn unbounded threads).
+    # With SO_REUSEPORT each listener gets its own socket and accept loop, and the
+    # kernel spreads new connections across them.
+    listeners = max(1, args.listeners) if hasattr(socket, "SO_REUSEPORT") else 1
+    pool = WorkerPool(THREAD_POOL_SIZE)
+    servers = []
+    try:
+        if listeners > 1:
+            # SO_REUSEPORT would happily join a port another server is already using;
+            # a plain bind first makes an occupied port fail as it does with one listener
+            with socket.socket(PooledHTTPServer.address_family, socket.SOCK_STREAM) as probe:
+                probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                probe.bind((args.bind, args.port))
+        for _ in range(listeners):
+            servers.append(PooledHTTPServer((args.bind, args.port), handler,
+                                            pool=pool, reuse_port=listeners > 1))
+    except OSError as e:
+        print(f"Error: could not bind to port {args.port}: {e}")
+        for server in servers:
+            server.server_close()
+        pool.shutdown()
+        return
     
     # Set up SSL if enabled
     if args.ssl:
-        server.socket = ssl.wrap_socket(server.socket, 
-                                       server_side=True,
-                                       certfile=args.cert,
-                                       keyfile=args.key)
+        ctx = create_ssl_context(args.cert, args.key)
+        for server in servers:
+            server.socket = ctx.wrap_socket(server.socket, server_side=True, do_handshake_on_connect=False)
         protocol = "HTTPS"
     else:
         protocol = "HTTP"
@@ -299,13 +804,23 @@ def main():
     else:
         print("File uploads: Disabled")
     
+    print(f"Listeners: {listeners}")
     print(f"{'=' * 50}")
     print("Press Ctrl+C to stop the server")
     
+    for server in servers[1:]:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    
     try:
-        server.serve_forever()
+        servers[0].serve_forever()
     except KeyboardInterrupt:
         print("\nServer stopped")
+    finally:
+        for server in servers[1:]:
+            server.shutdown()
+        for server in servers:
+            server.server_close()
+        pool.shutdown()
 
 if __name__ == "__main__":
     import sys
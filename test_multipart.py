@@ -0,0 +1,129 @@
+import io
+import os
+import tempfile
+import unittest
+
+from main import MAX_PART_HEADER_SIZE, CustomHTTPRequestHandler, MultipartParser
+
+BOUNDARY = b'----FormBoundary7MA4YWxk'
+
+
+def build_body(parts):
+    """Encode (filename, content) pairs as a multipart/form-data body"""
+    body = b'preamble\r\n'
+    for filename, content in parts:
+        body += (b'--' + BOUNDARY + b'\r\n'
+                 b'Content-Disposition: form-data; name="file"; filename="' + filename + b'"\r\n'
+                 b'Content-Type: application/octet-stream\r\n\r\n' + content + b'\r\n')
+    return body + b'--' + BOUNDARY + b'--\r\n'
+
+
+def parse(chunks):
+    """Feed chunks to a parser and return the (headers, content) of every part"""
+    parts = []
+
+    def on_part_begin(headers):
+        parts.append([bytes(headers), b''])
+
+    def on_part_data(data):
+        parts[-1][1] += bytes(data)
+
+    parser = MultipartParser(BOUNDARY, on_part_begin, on_part_data, lambda: None)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser, [(headers, content) for headers, content in parts]
+
+
+class MultipartParserTests(unittest.TestCase):
+
+    def assertParsed(self, chunks, expected):
+        parser, parts = parse(chunks)
+        self.assertTrue(parser.done)
+        self.assertEqual([content for _, content in parts], expected)
+        for index, (headers, _) in enumerate(parts):
+            self.assertIn(b'filename="f%d"' % index, headers)
+
+    def test_single_chunk(self):
+        contents = [b'hello', b'', b'second\r\nfile']
+        body = build_body([(b'f%d' % i, c) for i, c in enumerate(contents)])
+        self.assertParsed([body], contents)
+
+    def test_delimiter_split_across_feeds(self):
+        contents = [b'first part', b'second part']
+        body = build_body([(b'f%d' % i, c) for i, c in enumerate(contents)])
+        for split in range(1, len(body)):
+            with self.subTest(split=split):
+                self.assertParsed([body[:split], body[split:]], contents)
+
+    def test_byte_at_a_time(self):
+        contents = [b'abc\r\n--', b'xyz']
+        body = build_body([(b'f%d' % i, c) for i, c in enumerate(contents)])
+        self.assertParsed([body[i:i + 1] for i in range(len(body))], contents)
+
+    def test_near_delimiters_in_content(self):
+        contents = [
+            b'\r\n--' + BOUNDARY[:-1],
+            b'--' + BOUNDARY + b' without leading CRLF',
+            b'\r\n-\r\n--\r\n--' + BOUNDARY[:5] + b'\r\n',
+        ]
+        body = build_body([(b'f%d' % i, c) for i, c in enumerate(contents)])
+        for size in (1, 3, 7, len(BOUNDARY), len(BOUNDARY) + 4, len(body)):
+            with self.subTest(size=size):
+                chunks = [body[i:i + size] for i in range(0, len(body), size)]
+                self.assertParsed(chunks, contents)
+
+    def test_content_is_sliced_from_the_fed_buffer(self):
+        content = b'x' * 100000
+        buf = bytearray(build_body([(b'f0', content)]))
+        slices = []
+        parser = MultipartParser(BOUNDARY, lambda headers: None, slices.append, lambda: None)
+        parser.feed(memoryview(buf))
+        self.assertTrue(parser.done)
+        self.assertTrue(any(isinstance(s, memoryview) and s.obj is buf and len(s) > 90000 for s in slices))
+
+    def test_oversized_headers_rejected(self):
+        body = b'--' + BOUNDARY + b'\r\nX-Padding: ' + b'a' * MAX_PART_HEADER_SIZE
+        parser = MultipartParser(BOUNDARY, lambda headers: None, lambda data: None, lambda: None)
+        with self.assertRaises(ValueError):
+            parser.feed(body)
+
+
+    def test_unterminated_body_is_not_done(self):
+        body = build_body([(b'f0', b'x' * 1000)])
+        for cut in (len(body) - len(BOUNDARY) - 6, len(body) - 200):
+            with self.subTest(cut=cut):
+                parser, _ = parse([body[:cut]])
+                self.assertFalse(parser.done)
+
+
+class ReceiveMultipartTests(unittest.TestCase):
+
+    def receive(self, body):
+        handler = CustomHTTPRequestHandler.__new__(CustomHTTPRequestHandler)
+        handler.directory = self.directory
+        handler.rfile = io.BytesIO(body)
+        handler.log_message = lambda *args: None
+        handler.receive_multipart(BOUNDARY, len(body))
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+
+    def test_complete_upload_is_saved(self):
+        self.receive(build_body([(b'f0', b'x' * 1000)]))
+        with open(os.path.join(self.directory, 'f0'), 'rb') as f:
+            self.assertEqual(f.read(), b'x' * 1000)
+
+    def test_unterminated_upload_is_rejected_and_removed(self):
+        complete = build_body([(b'f0', b'done')])[:-len(b'--' + BOUNDARY + b'--\r\n')]
+        body = complete + build_body([(b'f1', b'x' * 1000)])[len(b'preamble\r\n'):]
+        for cut in (len(body) - len(BOUNDARY) - 6, len(body) - 200):
+            with self.subTest(cut=cut):
+                with self.assertRaises(ValueError):
+                    self.receive(body[:cut])
+                self.assertEqual(os.listdir(self.directory), ['f0'])
+
+
+if __name__ == '__main__':
+    unittest.main()